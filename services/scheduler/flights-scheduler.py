@@ -5,12 +5,15 @@ This script handles scheduled flight price monitoring tasks.
 """
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 from services.azair_scraper import FlightsService
 from services.email_sender import EmailSender
 from services.ai_destinations import AIDestinationsService
+from services.price_history import PriceHistoryStore, DealDetector
+from services.refresh_scheduler import RefreshScheduler
+from services.alert_outbox import AlertOutbox
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,34 +26,77 @@ def main():
 
     try:
         # Initialize services
-        flights_service = FlightsService()
+        # Keep every flight; deals are picked against price history below
+        flights_service = FlightsService(price_limit=None)
+        price_history = PriceHistoryStore()
+        deal_detector = DealDetector(
+            price_history,
+            fallback_price_limit=FlightsService.DEFAULT_PRICE_LIMIT
+        )
+        refresh_scheduler = RefreshScheduler(
+            price_history,
+            search_days=FlightsService.SEARCH_DAYS
+        )
         
-        # Initialize email service only if credentials are available
-        email_sender = None
-        try:
-            if os.getenv('EMAIL_USER') and os.getenv('EMAIL_PASSWORD'):
-                email_sender = EmailSender()
-                print("📧 Email service initialized")
-            else:
-                print("📧 Email service disabled (credentials not provided)")
-        except Exception as e:
-            print(f"⚠️ Email service initialization failed: {e}")
-            email_sender = None
+        # Alerts are queued here and delivered by outbox-worker.py
+        outbox = AlertOutbox()
         
-        print("Fetching flight data...")
+        # Only refetch date windows whose prices have probably changed
+        windows = refresh_scheduler.plan()
+        print(f"Fetching flight data for {len(windows)} date windows...")
         
-        # Get flights data
-        flights_data = flights_service.getFlights()
+        all_flights = []
+        fetched_windows = []
+        for window in windows:
+            # Returns may fall after the window's last departure day
+            flights_data = flights_service.getFlights(
+                window.startDate,
+                window.endDate + timedelta(days=FlightsService.MAX_DAYS_STAY)
+            )
+            print(
+                f"Window {window.startDate} - {window.endDate} "
+                f"(staleness {window.staleness:.2f}): "
+                f"{flights_data.status} {flights_data.message}, "
+                f"{len(flights_data.flights)} flights"
+            )
+            if flights_data.status != 200:
+                continue
+            fetched_windows.append(window)
+            # Keep only departures inside the window: later ones belong to
+            # the next window and would record a partial snapshot of it
+            first_day = window.startDate.isoformat()
+            last_day = window.endDate.isoformat()
+            all_flights.extend(
+                flight for flight in flights_data.flights
+                if first_day <= flight.departureDate <= last_day
+            )
+        refresh_scheduler.mark_fetched(fetched_windows)
         
-        print(f"Status: {flights_data.status}")
-        print(f"Message: {flights_data.message}")
-        date_range = f"{flights_data.startDate} - {flights_data.endDate}"
+        # Refreshed windows are often not contiguous; list the actual ranges
+        date_ranges = []
+        for window in fetched_windows:
+            if (date_ranges and date_ranges[-1][1] + timedelta(days=1)
+                    == window.startDate):
+                date_ranges[-1][1] = window.endDate
+            else:
+                date_ranges.append([window.startDate, window.endDate])
+        date_range = ", ".join(
+            f"{start:%-d.%-m.%Y} - {end:%-d.%-m.%Y}"
+            for start, end in date_ranges
+        ) or "no windows refreshed"
         print(f"Date Range: {date_range}")
         
-        flights = flights_data.flights
-        print(f"Found {len(flights)} flights")
+        # Score against history before recording this run's prices
+        flights = deal_detector.find_deals(all_flights)
+        recorded = price_history.append(all_flights)
+        print(
+            f"Recorded {recorded} prices in history "
+            f"({len(price_history)} total)"
+        )
+        print(f"Found {len(flights)} deals out of {len(all_flights)} flights")
 
-        destinations = list(set([flight.destination for flight in flights]))
+        # Sorted so identical runs compose identical (deduplicated) alerts
+        destinations = sorted(set(flight.destination for flight in flights))
         print(f"Destinations: {destinations}")
         
         # Get AI-generated destination descriptions and funny facts
@@ -84,31 +130,34 @@ def main():
             if len(flights) > 5:
                 print(f"\n... and {len(flights) - 5} more flights")
             
-            # Send email alert if recipients are configured
+            # Queue email alert if recipients are configured
             recipient_emails = os.getenv('ALERT_EMAILS')
-            if recipient_emails and email_sender:
+            if recipient_emails:
                 recipients = [
                     email.strip() for email in recipient_emails.split(',')
                 ]
-                print(f"\nSending email alert to: {', '.join(recipients)}")
+                print(f"\nQueueing email alert to: {', '.join(recipients)}")
                 
-                success = email_sender.send_flight_alert(
-                    recipients, 
-                    flights, 
-                    date_range,
-                    flights_data.url,
-                    ai_destination_content
+                subject, text_content, html_content = (
+                    EmailSender.compose_flight_alert(
+                        flights,
+                        date_range,
+                        flights_service.url,
+                        ai_destination_content
+                    )
+                )
+                queued = outbox.enqueue(
+                    AlertOutbox.flight_alert_key(recipients, flights),
+                    recipients,
+                    subject,
+                    text_content,
+                    html_content
                 )
                 
-                if success:
-                    print("✅ Email alert sent successfully!")
+                if queued:
+                    print("✅ Email alert queued for delivery")
                 else:
-                    print("❌ Failed to send email alert")
-            elif recipient_emails and not email_sender:
-                print(
-                    "⚠️ Email recipients configured but email service "
-                    "unavailable"
-                )
+                    print("📧 Alert for these deals already queued, skipping")
             else:
                 print(
                     "📧 No email recipients configured (ALERT_EMAILS not set)"
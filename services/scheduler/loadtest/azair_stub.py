@@ -0,0 +1,346 @@
+"""
+Local stand-in for azair.eu (and the OpenAI chat API) used by load tests.
+
+Serves response-examples/results.html, optionally scaled up with extra
+synthetic results, for any search URL, with dates moved into the
+requested search range. Latency, error rate and throttling
+are configurable so the scheduler can be exercised without hitting the
+real services.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from services.azair_scraper import FlightsService
+
+EXAMPLE_RESULTS = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..",
+    "response-examples", "results.html"
+)
+
+
+class ScaledResults:
+    """
+    Builds results pages with the example results repeated N times.
+
+    When the search range is known, every result is moved into it: the
+    departure is spread over the range's departure days and each copy gets
+    a different day (and, once days run out, a different departure
+    minute), so scaled copies stay distinct trips for the scheduler.
+    """
+
+    RESULT_MARKER = '<div class="result '
+    PRICE_PATTERN = re.compile(r'(<span class="tp">)(\d+)( zł</span>)')
+    DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+    TIME_PATTERN = re.compile(r'<strong>(\d{2}):(\d{2})</strong>')
+
+    def __init__(self, path: str = EXAMPLE_RESULTS):
+        """Split the example page into head, result blocks and tail."""
+        with open(path, encoding="utf-8") as results_file:
+            html = results_file.read()
+
+        start = html.rindex("\n", 0, html.index(self.RESULT_MARKER)) + 1
+        # The results list is closed right before the right side ads
+        end = html.rindex("</div>", 0, html.index('<div id="rightsideAds">'))
+        self.head = html[:start]
+        self.tail = html[end:]
+        results = html[start:end]
+        starts = [
+            match.start() for match in re.finditer(
+                rf"^[ \t]*{re.escape(self.RESULT_MARKER)}", results, re.M
+            )
+        ]
+        self.blocks = [
+            results[a:b] for a, b in zip(starts, starts[1:] + [len(results)])
+        ]
+        self.departures = [
+            date.fromisoformat(self.DATE_PATTERN.search(block).group(0))
+            for block in self.blocks
+        ]
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        scale: int,
+        first_day: Optional[date] = None,
+        last_day: Optional[date] = None
+    ) -> bytes:
+        """
+        Return a page with `scale` copies of every example result.
+
+        Args:
+            scale: Copies of each example result
+            first_day: First departure day of the search (depdate)
+            last_day: Last return day of the search (arrdate)
+        """
+        scale = max(1, scale)
+        key = (scale, first_day, last_day)
+        with self._lock:
+            if key not in self._cache:
+                page = self._build(scale, first_day, last_day)
+                self._cache[key] = page.encode("utf-8")
+            return self._cache[key]
+
+    def _build(
+        self,
+        scale: int,
+        first_day: Optional[date],
+        last_day: Optional[date]
+    ) -> str:
+        rng = random.Random(scale)
+        days = 1
+        if first_day and last_day:
+            # Departures must leave room for the longest stay
+            days = max(
+                1, (last_day - first_day).days - FlightsService.MAX_DAYS_STAY
+            ) + 1
+
+        def jitter_price(match: re.Match) -> str:
+            price = round(int(match.group(2)) * rng.uniform(0.7, 1.5))
+            return f"{match.group(1)}{price}{match.group(3)}"
+
+        copies = []
+        for copy in range(scale):
+            for i, block in enumerate(self.blocks):
+                if first_day:
+                    departure = first_day + timedelta(days=(i + copy) % days)
+                    shift = departure - self.departures[i]
+                    minutes = copy // days
+                else:
+                    shift, minutes = timedelta(days=copy), 0
+                block = self.DATE_PATTERN.sub(
+                    lambda match: (
+                        date.fromisoformat(match.group(0)) + shift
+                    ).isoformat(),
+                    block
+                )
+                if minutes:
+                    block = self.TIME_PATTERN.sub(
+                        lambda match: (
+                            f"<strong>{match.group(1)}:"
+                            f"{(int(match.group(2)) + minutes) % 60:02d}"
+                            f"</strong>"
+                        ),
+                        block,
+                        count=1
+                    )
+                if copy:
+                    # Jitter prices so the copies are not identical rows
+                    block = self.PRICE_PATTERN.sub(jitter_price, block)
+                copies.append(block)
+        return self.head + "".join(copies) + self.tail
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to throttle requests."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Take a token; False means the request should be throttled."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class AzairStubServer(ThreadingHTTPServer):
+    """HTTP server answering azair searches and OpenAI chat completions."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        scale: int = 1,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        burst: int = 10
+    ):
+        """
+        Initialize the stub server.
+
+        Args:
+            address: (host, port) to bind, port 0 picks a free one
+            scale: Default results multiplier (overridable per request
+                with a `scale` query parameter)
+            latency: Base response delay in seconds
+            jitter: Extra uniformly distributed delay in seconds
+            error_rate: Share of requests answered with 503
+            rate_limit: Requests per second before answering 429
+            burst: Token bucket size for rate_limit
+        """
+        super().__init__(address, StubRequestHandler)
+        self.results = ScaledResults()
+        self.scale = scale
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler for AzairStubServer."""
+
+    server: AzairStubServer
+    DESTINATIONS_PATTERN = re.compile(r"destynacji:\s*(.+)")
+
+    def log_message(self, format, *args):
+        pass  # Keep load test output readable
+
+    def _admit(self) -> bool:
+        """Apply throttling, latency and error injection."""
+        server = self.server
+        server.count("requests")
+        if server.bucket and not server.bucket.take():
+            server.count("throttled")
+            self._send(429, b"Too Many Requests", "text/plain")
+            return False
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < server.error_rate:
+            server.count("errors")
+            self._send(503, b"Service Unavailable", "text/plain")
+            return False
+        return True
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self._admit():
+            return
+        query = parse_qs(urlparse(self.path).query)
+        scale = int(query.get("scale", [self.server.scale])[0])
+        first_day, last_day = (
+            self._parse_date(query, "depdate"),
+            self._parse_date(query, "arrdate"),
+        )
+        page = self.server.results.render(scale, first_day, last_day)
+        self._send(200, page, "text/html; charset=utf-8")
+
+    @staticmethod
+    def _parse_date(query: dict, name: str) -> Optional[date]:
+        """Parse an azair d.m.yyyy query parameter."""
+        try:
+            return datetime.strptime(query[name][0], "%d.%m.%Y").date()
+        except (KeyError, ValueError):
+            return None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = self.rfile.read(length)
+        if not urlparse(self.path).path.endswith("/chat/completions"):
+            self._send(404, b"Not Found", "text/plain")
+            return
+        if not self._admit():
+            return
+        body = json.dumps(self._chat_completion(json.loads(payload)))
+        self._send(200, body.encode("utf-8"), "application/json")
+
+    def _chat_completion(self, request: dict) -> dict:
+        """Answer with an entry for each destination found in the prompt."""
+        prompt = request["messages"][-1]["content"]
+        match = self.DESTINATIONS_PATTERN.search(prompt)
+        destinations = [
+            destination.strip() for destination in match.group(1).split(",")
+        ] if match else []
+        if request.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps({"destinations": [
+                {"name": destination, "description": "Opis. Zabawny fakt."}
+                for destination in destinations
+            ]}, ensure_ascii=False)
+        else:
+            content = "\n".join(
+                f"{destination}: Opis miejsca. Zabawny fakt."
+                for destination in destinations
+            )
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+            },
+        }
+
+
+def main():
+    """Run the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=10)
+    args = parser.parse_args()
+
+    server = AzairStubServer(
+        (args.host, args.port),
+        scale=args.scale,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst
+    )
+    print(f"Azair stub listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
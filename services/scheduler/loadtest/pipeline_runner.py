@@ -0,0 +1,96 @@
+"""
+Runs flights-scheduler.py once and reports per-stage timings as JSON.
+
+Meant to be spawned by run_load_test.py with the environment pointing
+at the local stub services. Scheduler output is discarded; the last line
+on stdout is a JSON object with stage latencies, scrape request
+outcomes and peak RSS.
+"""
+import contextlib
+import functools
+import io
+import json
+import os
+import resource
+import runpy
+import sys
+import time
+
+SCHEDULER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCHEDULER_DIR)
+
+from services.azair_scraper import FlightsService  # noqa: E402
+from services.alert_outbox import AlertOutbox  # noqa: E402
+from services.ai_destinations import AIDestinationsService  # noqa: E402
+from services.price_history import (  # noqa: E402
+    DealDetector,
+    PriceHistoryStore,
+)
+
+# Stage name -> methods whose time counts towards it
+STAGES = {
+    "scrape": [(FlightsService, "getFlights")],
+    "deals": [(DealDetector, "find_deals"), (PriceHistoryStore, "append")],
+    "enrich": [(AIDestinationsService, "get_destinations_info")],
+    "outbox": [(AlertOutbox, "enqueue")],
+}
+
+
+def _timed(timings: dict, stage: str, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+    return wrapper
+
+
+def _counted(scrape: dict, method):
+    """Count getFlights calls that did not return HTTP 200."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        flights_data = method(*args, **kwargs)
+        scrape["requests"] += 1
+        if flights_data.status != 200:
+            scrape["failed"] += 1
+        return flights_data
+    return wrapper
+
+
+def main():
+    timings = {}
+    for stage, methods in STAGES.items():
+        for cls, name in methods:
+            setattr(cls, name, _timed(timings, stage, getattr(cls, name)))
+
+    # The scheduler survives scrape errors, so count them separately
+    scrape = {"requests": 0, "failed": 0}
+    FlightsService.getFlights = _counted(scrape, FlightsService.getFlights)
+
+    ok = True
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            runpy.run_path(
+                os.path.join(SCHEDULER_DIR, "flights-scheduler.py"),
+                run_name="__main__"
+            )
+        except SystemExit as e:
+            ok = not e.code
+    timings["total"] = time.perf_counter() - start
+
+    print(json.dumps({
+        "ok": ok,
+        "timings": timings,
+        "scrape_requests": scrape["requests"],
+        "scrape_failed": scrape["failed"],
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+End-to-end load test for the flights scheduler.
+
+Starts the azair/OpenAI stub server and an SMTP sink, then runs the full
+flights-scheduler.py pipeline at increasing search counts and reports
+runs per minute, p50/p95 stage latencies and peak RSS. Runs where any
+azair request failed (503, 429, ...) are counted as degraded and left out
+of throughput and latencies, along with runs that crashed. After each level
+the shared outbox is drained by an OutboxWorker into the SMTP sink.
+
+Usage (from services/scheduler):
+    python -m loadtest.run_load_test --searches 1,5,10,20 --concurrency 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+from loadtest.azair_stub import AzairStubServer
+from loadtest.smtp_sink import SMTPSink
+from services.alert_outbox import AlertOutbox, OutboxWorker
+from services.email_sender import EmailSender
+
+RUNNER = os.path.join(os.path.dirname(__file__), "pipeline_runner.py")
+STAGES = ["scrape", "deals", "enrich", "outbox", "total"]
+
+
+def _start(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def _run_pipeline(env: Dict[str, str]) -> dict:
+    """Run the pipeline once in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, RUNNER],
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {
+            "ok": False,
+            "timings": {},
+            "scrape_requests": 0,
+            "scrape_failed": 0,
+            "peak_rss_kb": 0,
+        }
+    return json.loads(lines[-1])
+
+
+def run_level(
+    searches: int,
+    concurrency: int,
+    base_env: Dict[str, str],
+    history_root: str,
+    worker: OutboxWorker
+) -> dict:
+    """Run `searches` pipelines, `concurrency` at a time, then deliver."""
+    envs = []
+    for i in range(searches):
+        env = dict(base_env)
+        # Separate history per run so concurrent appends do not interleave
+        env["PRICE_HISTORY_DIR"] = os.path.join(
+            history_root, f"{searches}-{i}"
+        )
+        envs.append(env)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_run_pipeline, envs))
+    elapsed = time.perf_counter() - start
+
+    deliver_start = time.perf_counter()
+    delivered = worker.drain()
+    deliver_seconds = time.perf_counter() - deliver_start
+
+    crashed = [r for r in results if not r["ok"]]
+    degraded = [r for r in results if r["ok"] and r["scrape_failed"]]
+    completed = [r for r in results if r["ok"] and not r["scrape_failed"]]
+    report = {
+        "searches": searches,
+        "ok": len(completed),
+        "degraded": len(degraded),
+        "failed": len(crashed),
+        "scrape_requests": sum(r["scrape_requests"] for r in results),
+        "scrape_failed": sum(r["scrape_failed"] for r in results),
+        "runs_per_minute": len(completed) / elapsed * 60,
+        "peak_rss_mb": max(
+            (r["peak_rss_kb"] for r in results), default=0
+        ) / 1024,
+        "delivered": delivered,
+        "deliver_seconds": deliver_seconds,
+    }
+    for stage in STAGES:
+        samples = [r["timings"][stage] for r in completed
+                   if stage in r["timings"]]
+        if samples:
+            p50, p95 = np.percentile(samples, [50, 95])
+            report[stage] = (p50, p95)
+    return report
+
+
+def print_report(reports: List[dict]) -> None:
+    header = (
+        f"{'searches':>8} {'ok':>4} {'degr':>4} {'fail':>4} "
+        f"{'scrape err':>10} {'runs/min':>9}"
+    )
+    for stage in STAGES:
+        header += f" {stage + ' p50/p95 (s)':>22}"
+    header += f" {'peak RSS':>9} {'delivered':>9} {'deliver (s)':>11}"
+    print(header)
+    for report in reports:
+        scrape_errors = (
+            f"{report['scrape_failed']}/{report['scrape_requests']}"
+        )
+        row = (
+            f"{report['searches']:>8} {report['ok']:>4} "
+            f"{report['degraded']:>4} {report['failed']:>4} "
+            f"{scrape_errors:>10} {report['runs_per_minute']:>9.1f}"
+        )
+        for stage in STAGES:
+            if stage in report:
+                p50, p95 = report[stage]
+                row += f" {f'{p50:.3f} / {p95:.3f}':>22}"
+            else:
+                row += f" {'-':>22}"
+        row += f" {report['peak_rss_mb']:>6.1f} MB"
+        row += f" {report['delivered']:>9} {report['deliver_seconds']:>11.3f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--searches", default="1,5,10,20",
+        help="Comma-separated search counts to run, in order"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--scale", type=int, default=1,
+        help="Multiplier for the number of results per search page"
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=10)
+    args = parser.parse_args()
+
+    stub = AzairStubServer(
+        ("127.0.0.1", 0),
+        scale=args.scale,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst
+    )
+    smtp_sink = SMTPSink(("127.0.0.1", 0))
+    _start(stub)
+    _start(smtp_sink)
+
+    base_env = dict(os.environ)
+    base_env.update({
+        "AZAIR_BASE_URL": stub.base_url,
+        "OPENAI_BASE_URL": f"{stub.base_url}/v1",
+        "OPENAI_API_KEY": "loadtest",
+        "EMAIL_USER": "loadtest@example.com",
+        "EMAIL_PASSWORD": "loadtest",
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(smtp_sink.server_address[1]),
+        "SMTP_USE_TLS": "false",
+        "ALERT_EMAILS": "loadtest@example.com",
+    })
+
+    reports = []
+    with tempfile.TemporaryDirectory() as history_root:
+        # One outbox for all runs: identical alerts are only sent once
+        base_env["ALERT_OUTBOX_PATH"] = os.path.join(
+            history_root, "outbox.sqlite3"
+        )
+        # EmailSender reads its SMTP settings from the environment
+        os.environ.update(base_env)
+        worker = OutboxWorker(AlertOutbox(), EmailSender())
+
+        for searches in [int(s) for s in args.searches.split(",")]:
+            reports.append(run_level(
+                searches, args.concurrency, base_env, history_root, worker
+            ))
+
+    print_report(reports)
+    print(
+        f"\nStub: {stub.stats['requests']} requests, "
+        f"{stub.stats['throttled']} throttled, "
+        f"{stub.stats['errors']} errors; "
+        f"SMTP sink: {smtp_sink.messages} messages"
+    )
+    stub.shutdown()
+    smtp_sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
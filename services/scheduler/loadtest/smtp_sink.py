@@ -0,0 +1,62 @@
+"""
+Minimal local SMTP sink that accepts and discards every message.
+
+Speaks just enough SMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA) for
+EmailSender with SMTP_USE_TLS=false.
+"""
+import socketserver
+import threading
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Handles a single SMTP session."""
+
+    server: "SMTPSink"
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        self._reply("220 localhost SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().upper()
+
+            if command.startswith("EHLO"):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN")
+            elif command.startswith("HELO"):
+                self._reply("250 localhost")
+            elif command.startswith("AUTH"):
+                self._reply("235 Authentication successful")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.count_message()
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Threaded SMTP server counting the messages it receives."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int]):
+        super().__init__(address, SMTPSinkHandler)
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def count_message(self) -> None:
+        with self._lock:
+            self.messages += 1
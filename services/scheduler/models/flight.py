@@ -8,6 +8,7 @@ class Flight(BaseModel):
     priceText: str
     price: float
     destination: str
+    departureDate: str
 
 
 class FlightData(BaseModel):
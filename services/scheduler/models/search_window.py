@@ -0,0 +1,9 @@
+from datetime import date
+from pydantic import BaseModel
+
+
+class SearchWindow(BaseModel):
+    windowId: int
+    startDate: date
+    endDate: date
+    staleness: float
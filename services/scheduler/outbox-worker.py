@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Outbox worker for delivering queued flight alerts.
+Runs continuously, or drains the outbox once with --once (e.g. as cron).
+Alerts that used up their attempts can be retried with --requeue-dead.
+"""
+import argparse
+import sys
+import os
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+
+from services.email_sender import EmailSender
+from services.alert_outbox import AlertOutbox, OutboxWorker
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def main():
+    """Main function that delivers queued alerts."""
+    parser = argparse.ArgumentParser(description="Deliver queued alerts")
+    parser.add_argument(
+        "--once", action="store_true",
+        help="Drain due messages and exit instead of polling"
+    )
+    parser.add_argument(
+        "--requeue-dead", action="store_true",
+        help="Retry messages that used up their attempts before delivering"
+    )
+    args = parser.parse_args()
+
+    print("=== Outbox Worker Started ===")
+    print(f"Timestamp: {datetime.now().isoformat()}")
+
+    try:
+        outbox = AlertOutbox()
+        if args.requeue_dead:
+            print(f"Requeued {outbox.requeue_dead()} dead messages")
+        worker = OutboxWorker(
+            outbox,
+            EmailSender(),
+            batch_size=int(
+                os.getenv('OUTBOX_BATCH_SIZE', OutboxWorker.DEFAULT_BATCH_SIZE)
+            )
+        )
+        poll_seconds = float(os.getenv('OUTBOX_POLL_SECONDS', '30'))
+
+        while True:
+            claimed = worker.drain()
+            if claimed:
+                print(f"Processed {claimed} messages: {outbox.counts()}")
+            if args.once:
+                break
+            time.sleep(poll_seconds)
+
+    except KeyboardInterrupt:
+        print("=== Outbox Worker Stopped ===")
+    except Exception as e:
+        print(f"Error in outbox worker: {e}")
+        print("=== Outbox Worker Failed ===")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
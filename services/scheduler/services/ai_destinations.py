@@ -1,9 +1,11 @@
 """
 AI Destinations Service - OpenAI integration for destination descriptions and funny facts.
 """
+import asyncio
+import json
 import os
 from typing import List, Dict
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,19 +15,44 @@ load_dotenv()
 class AIDestinationsService:
     """Service for getting destination descriptions and funny facts using OpenAI."""
     
+    DEFAULT_CHUNK_SIZE = 8
+    DEFAULT_MAX_CONCURRENCY = 4
+    # Per request; with the retry a hung chunk costs at most twice this
+    DEFAULT_TIMEOUT_SECONDS = 60
+    MAX_RETRIES = 1
+    MAX_TOKENS_PER_DESTINATION = 300
+    SYSTEM_PROMPT = (
+        "Jesteś pomocnym asystentem, który udziela informacji o miejscach "
+        "podróży po polsku. Jesteś precyzyjny, zwięzły i zabawny w swoich "
+        "odpowiedziach. Odpowiadasz wyłącznie poprawnym JSON-em."
+    )
+    FAILED_TEXT = "Nie udało się pobrać informacji o tym miejscu."
+    MISSING_TEXT = "Piękne miejsce warte odwiedzenia."
+    
     def __init__(self):
-        """Initialize the AI service with OpenAI client."""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        """Initialize the AI service configuration."""
+        self.api_key = os.getenv('OPENAI_API_KEY')
+        if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=api_key)
         self.model = "gpt-4o-mini"  # Using OpenAI's mini model
+        # Zero or negative values would break chunking or block forever
+        self.chunk_size = max(1, int(
+            os.getenv('AI_CHUNK_SIZE', self.DEFAULT_CHUNK_SIZE)
+        ))
+        self.max_concurrency = max(1, int(
+            os.getenv('AI_MAX_CONCURRENCY', self.DEFAULT_MAX_CONCURRENCY)
+        ))
+        self.timeout = float(
+            os.getenv('AI_TIMEOUT', self.DEFAULT_TIMEOUT_SECONDS)
+        )
     
     def get_destinations_info(self, destinations: List[str]) -> Dict[str, str]:
         """
         Get descriptions and funny facts for a list of destinations.
         
+        Synchronous wrapper around get_destinations_info_async.
+        
         Args:
             destinations: List of destination names (e.g., ["London", "Barcelona"])
             
@@ -34,81 +61,121 @@ class AIDestinationsService:
         """
         if not destinations:
             return {}
+        return asyncio.run(self.get_destinations_info_async(destinations))
+    
+    async def get_destinations_info_async(
+        self,
+        destinations: List[str]
+    ) -> Dict[str, str]:
+        """
+        Get destination info in concurrent, bounded chunks.
         
-        try:
-            # Create the prompt in Polish
-            destinations_text = ", ".join(destinations)
-            prompt = f"""
+        Destinations are split into chunks of chunk_size, at most
+        max_concurrency chunks are requested at once, and a failed or
+        timed out chunk only falls back for its own destinations.
+        
+        Args:
+            destinations: List of destination names
+            
+        Returns:
+            Dictionary with destination names as keys and descriptions as
+            values, in the order of the input
+        """
+        # Skip duplicates but keep the caller's order
+        destinations = list(dict.fromkeys(destinations))
+        if not destinations:
+            return {}
+        
+        chunks = [
+            destinations[i:i + self.chunk_size]
+            for i in range(0, len(destinations), self.chunk_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async with AsyncOpenAI(
+            api_key=self.api_key,
+            timeout=self.timeout,
+            max_retries=self.MAX_RETRIES
+        ) as client:
+            results = await asyncio.gather(*[
+                self._get_chunk_info(client, semaphore, chunk)
+                for chunk in chunks
+            ])
+        
+        info = {}
+        for chunk_info in results:
+            info.update(chunk_info)
+        return info
+    
+    async def _get_chunk_info(
+        self,
+        client: AsyncOpenAI,
+        semaphore: asyncio.Semaphore,
+        destinations: List[str]
+    ) -> Dict[str, str]:
+        """Request and parse info for a single chunk of destinations."""
+        destinations_text = ", ".join(destinations)
+        prompt = f"""
             Dla następujących miast/destynacji: {destinations_text}
             
             Dla każdego miejsca napisz krótki opis (3-5 zdania) oraz jeden zabawny/ciekawy fakt o tym miejscu.
             
-            Odpowiedź sformatuj dokładnie w następującym formacie:
-            [krótki opis miejsca rozpoczynający się od nazwy miejsca] [zabawny fakt o miejscu]
+            Odpowiedź zwróć jako obiekt JSON w dokładnie takim formacie:
+            {{"destinations": [{{"name": "<nazwa miejsca dokładnie jak podana>", "description": "<krótki opis miejsca> <zabawny fakt o miejscu>"}}]}}
             
-            Każde miejsce w osobnej linii. Pomijaj zdublowanie miejsca. Odpowiadaj tylko po polsku.
+            Każde miejsce dokładnie raz. Odpowiadaj tylko po polsku.
             """
+        
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": self.SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    max_tokens=(
+                        self.MAX_TOKENS_PER_DESTINATION * len(destinations)
+                    ),
+                    temperature=0.7
+                )
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Jesteś pomocnym asystentem, który udziela informacji o miejscach podróży po polsku. Jesteś precyzyjny, zwięzły i zabawny w swoich odpowiedziach."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            # Parse the response
-            content = response.choices[0].message.content.strip()
+            content = response.choices[0].message.content
             return self._parse_response(content, destinations)
             
         except Exception as e:
-            print(f"Error calling OpenAI API: {e}")
-            # Return fallback responses
-            return {dest: f"{dest}: Nie udało się pobrać informacji o tym miejscu." for dest in destinations}
+            print(f"Error calling OpenAI API for {destinations_text}: {e}")
+            # Return fallback responses for this chunk only
+            return {dest: f"{dest}: {self.FAILED_TEXT}" for dest in destinations}
     
     def _parse_response(self, content: str, original_destinations: List[str]) -> Dict[str, str]:
         """
-        Parse the OpenAI response into a dictionary.
+        Parse the structured OpenAI response into a dictionary.
         
         Args:
-            content: Raw response from OpenAI
-            original_destinations: Original list of destinations for fallback
+            content: Raw JSON response from OpenAI
+            original_destinations: Destinations requested in this chunk
             
         Returns:
             Dictionary with destination names as keys and descriptions as values
+            
+        Raises:
+            ValueError: If the response is not the expected JSON object
         """
-        result = {}
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if ':' in line and line:
-                # Split on first occurrence of ':'
-                parts = line.split(':', 1)
-                if len(parts) == 2:
-                    city = parts[0].strip()
-                    description = parts[1].strip()
-                    result[city] = f"{city}: {description}"
+        try:
+            items = json.loads(content)["destinations"]
+            descriptions = {
+                item["name"].strip().casefold(): item["description"].strip()
+                for item in items
+            }
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed destinations JSON: {e}") from e
         
-        # Ensure we have responses for all requested destinations
+        result = {}
         for dest in original_destinations:
-            found = False
-            for key in result.keys():
-                if dest.lower() in key.lower() or key.lower() in dest.lower():
-                    found = True
-                    break
-            
-            if not found:
-                result[dest] = f"{dest}: Piękne miejsce warte odwiedzenia."
-        
+            description = descriptions.get(dest.casefold(), self.MISSING_TEXT)
+            result[dest] = f"{dest}: {description}"
         return result
     
     def format_response(self, destinations_info: Dict[str, str]) -> str:
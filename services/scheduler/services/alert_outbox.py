@@ -0,0 +1,396 @@
+"""
+Alert Outbox - durable SQLite queue of alert emails awaiting delivery.
+
+The scrape job only writes alerts here; OutboxWorker delivers them
+separately with batching and retries. Each message is keyed by the facts
+of its alert (recipients and deal flights), not by its rendered text, so
+re-running the scheduler for the same deals sends the alert once even
+though the AI highlights and date range in the email differ.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from models.flight import Flight
+from services.email_sender import EmailSender
+
+
+class OutboxMessage(BaseModel):
+    id: int
+    alertKey: str
+    recipients: List[str]
+    subject: str
+    textContent: str
+    htmlContent: Optional[str]
+    attempts: int
+    leaseExpiresAt: float
+
+
+class AlertOutbox:
+    """SQLite-backed outbox of alert emails."""
+
+    DEFAULT_PATH = "data/outbox.sqlite3"
+    # With the backoff capped at an hour, about two days of failed sends
+    DEFAULT_MAX_ATTEMPTS = 48
+    DEFAULT_LEASE_SECONDS = 300
+    BACKOFF_BASE_SECONDS = 30
+    BACKOFF_MAX_SECONDS = 3600
+
+    # pending -> sending -> sent, or back to pending with a backoff until
+    # max attempts are used up and the message is marked dead. While a
+    # message is 'sending', next_attempt_at is the expiry of its lease.
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_key TEXT NOT NULL UNIQUE,
+            recipients TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            text_content TEXT NOT NULL,
+            html_content TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            sent_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS outbox_due
+            ON outbox (status, next_attempt_at);
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS
+    ):
+        """
+        Open (and create if needed) the outbox database.
+
+        Args:
+            path: Database file (env ALERT_OUTBOX_PATH)
+            max_attempts: Failed sends before a message is marked dead
+                (env OUTBOX_MAX_ATTEMPTS)
+            lease_seconds: How long a claimed message is reserved for the
+                worker that claimed it
+        """
+        self.path = path or os.getenv('ALERT_OUTBOX_PATH', self.DEFAULT_PATH)
+        self.max_attempts = max_attempts or int(
+            os.getenv('OUTBOX_MAX_ATTEMPTS', self.DEFAULT_MAX_ATTEMPTS)
+        )
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    @staticmethod
+    def flight_alert_key(recipients: List[str], flights: List[Flight]) -> str:
+        """
+        Return the idempotency key of a flight alert.
+
+        Only the recipients and the deal flights (route, dates and price)
+        identify an alert; its rendered subject and bodies are left out.
+        """
+        payload = json.dumps(
+            [
+                sorted(recipients),
+                sorted(
+                    (flight.start, flight.return_flight, flight.price)
+                    for flight in flights
+                ),
+            ],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def enqueue(
+        self,
+        alert_key: str,
+        recipients: List[str],
+        subject: str,
+        text_content: str,
+        html_content: Optional[str] = None
+    ) -> bool:
+        """
+        Durably queue a message for delivery.
+
+        Args:
+            alert_key: Idempotency key, see flight_alert_key()
+            recipients: List of recipient email addresses
+            subject: Email subject
+            text_content: Plain text email content
+            html_content: Optional HTML email content
+
+        Returns:
+            bool: True if queued, False if a message with the same key was
+                already queued or sent
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                """
+                INSERT OR IGNORE INTO outbox (
+                    alert_key, recipients, subject, text_content,
+                    html_content, next_attempt_at, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    alert_key, json.dumps(recipients), subject,
+                    text_content, html_content, now, now
+                )
+            )
+            return cursor.rowcount == 1
+
+    def claim_batch(self, limit: int) -> List[OutboxMessage]:
+        """
+        Lease up to `limit` due messages for delivery.
+
+        Messages leased by a worker that died are claimable again once
+        their lease expires. Updates for a message only apply while the
+        lease it was claimed with is still held, see _LEASE_GUARD.
+        """
+        now = time.time()
+        lease_expires_at = now + self.lease_seconds
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                """
+                SELECT * FROM outbox
+                WHERE status IN ('pending', 'sending')
+                  AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+                """,
+                (now, limit)
+            ).fetchall()
+            connection.executemany(
+                """
+                UPDATE outbox SET status = 'sending', next_attempt_at = ?
+                WHERE id = ?
+                """,
+                [(lease_expires_at, row["id"]) for row in rows]
+            )
+            connection.commit()
+
+        return [
+            OutboxMessage(
+                id=row["id"],
+                alertKey=row["alert_key"],
+                recipients=json.loads(row["recipients"]),
+                subject=row["subject"],
+                textContent=row["text_content"],
+                htmlContent=row["html_content"],
+                attempts=row["attempts"],
+                leaseExpiresAt=lease_expires_at
+            )
+            for row in rows
+        ]
+
+    # Matches a message only while the lease it was claimed with is held;
+    # once it expired and another worker re-claimed the message, the late
+    # update is dropped instead of overwriting the new owner's outcome
+    _LEASE_GUARD = "id = ? AND status = 'sending' AND next_attempt_at = ?"
+
+    def mark_sent(self, message: OutboxMessage) -> bool:
+        """
+        Record a successful send.
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                f"""
+                UPDATE outbox
+                SET status = 'sent', attempts = attempts + 1, sent_at = ?,
+                    last_error = NULL
+                WHERE {self._LEASE_GUARD}
+                """,
+                (time.time(), message.id, message.leaseExpiresAt)
+            )
+            return cursor.rowcount == 1
+
+    def mark_failed(self, message: OutboxMessage, error: str) -> bool:
+        """
+        Schedule a retry with exponential backoff, or give up.
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        attempts = message.attempts + 1
+        delay = min(
+            self.BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+            self.BACKOFF_MAX_SECONDS
+        )
+        status = 'dead' if attempts >= self.max_attempts else 'pending'
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                f"""
+                UPDATE outbox
+                SET status = ?, attempts = ?, next_attempt_at = ?,
+                    last_error = ?
+                WHERE {self._LEASE_GUARD}
+                """,
+                (
+                    status, attempts, time.time() + delay, error,
+                    message.id, message.leaseExpiresAt
+                )
+            )
+            return cursor.rowcount == 1
+
+    def release(
+        self,
+        messages: List[OutboxMessage],
+        delay: float = 0,
+        error: Optional[str] = None
+    ) -> None:
+        """Return leased messages to the queue without using an attempt."""
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                f"""
+                UPDATE outbox
+                SET status = 'pending', next_attempt_at = ?,
+                    last_error = COALESCE(?, last_error)
+                WHERE {self._LEASE_GUARD}
+                """,
+                [
+                    (
+                        time.time() + delay, error,
+                        message.id, message.leaseExpiresAt
+                    )
+                    for message in messages
+                ]
+            )
+
+    def requeue_dead(self) -> int:
+        """
+        Give dead messages a fresh set of attempts, due now.
+
+        Returns:
+            int: Number of messages requeued
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                """
+                UPDATE outbox
+                SET status = 'pending', attempts = 0, next_attempt_at = ?
+                WHERE status = 'dead'
+                """,
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> dict:
+        """Return the number of messages per status."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+
+class OutboxWorker:
+    """Delivers queued alerts in batches over a single SMTP connection."""
+
+    DEFAULT_BATCH_SIZE = 20
+
+    def __init__(
+        self,
+        outbox: AlertOutbox,
+        email_sender: EmailSender,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        Initialize the worker.
+
+        Raises:
+            ValueError: If the SMTP timeout does not fit in the outbox lease,
+                since a hung send could then outlive the lease and another
+                worker would send the same message again
+        """
+        if email_sender.timeout >= outbox.lease_seconds:
+            raise ValueError(
+                f"SMTP timeout ({email_sender.timeout}s) must be shorter "
+                f"than the outbox lease ({outbox.lease_seconds}s)"
+            )
+        self.outbox = outbox
+        self.email_sender = email_sender
+        self.batch_size = batch_size
+
+    def deliver_batch(self) -> int:
+        """
+        Deliver one batch of due messages.
+
+        Returns:
+            int: Number of messages claimed (sent or rescheduled)
+        """
+        batch = self.outbox.claim_batch(self.batch_size)
+        if not batch:
+            return 0
+        # Stop starting sends that could still be running when the lease
+        # expires; the rest of the batch goes back to the queue
+        deadline = (
+            time.monotonic()
+            + self.outbox.lease_seconds
+            - self.email_sender.timeout
+        )
+
+        try:
+            server = self.email_sender.connect()
+        except Exception as e:
+            # The server is down, not the messages: retry later without
+            # using up their attempts
+            logging.error(f"SMTP connection failed: {str(e)}")
+            self.outbox.release(
+                batch, self.outbox.BACKOFF_BASE_SECONDS, f"connect: {e}"
+            )
+            return len(batch)
+
+        with server:
+            for i, message in enumerate(batch):
+                if time.monotonic() > deadline:
+                    self.outbox.release(batch[i:])
+                    break
+                try:
+                    server.send_message(self.email_sender.build_message(
+                        message.recipients,
+                        message.subject,
+                        message.textContent,
+                        message.htmlContent
+                    ))
+                except Exception as e:
+                    logging.error(
+                        f"Failed to send outbox message {message.id}: {e}"
+                    )
+                    lease_held = self.outbox.mark_failed(message, str(e))
+                else:
+                    lease_held = self.outbox.mark_sent(message)
+                if not lease_held:
+                    logging.warning(
+                        f"Lease on outbox message {message.id} expired "
+                        f"before it was recorded"
+                    )
+        return len(batch)
+
+    def drain(self) -> int:
+        """Deliver batches until nothing is due. Returns messages claimed."""
+        total = 0
+        while claimed := self.deliver_batch():
+            total += claimed
+        return total
+
@@ -1,8 +1,9 @@
+import os
 import requests
 from bs4 import BeautifulSoup, Tag
 from typing import List, Optional
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from models.flight import Flight, FlightData
 
@@ -12,13 +13,16 @@ class FlightsService:
     
     # Constants
     DEFAULT_PRICE_LIMIT = 300
+    SEARCH_DAYS = 90  # Approximately 3 months
+    MAX_DAYS_STAY = 5  # Matches maxDaysStay in BASE_URL_TEMPLATE
     USER_AGENT = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/91.0.4472.124 Safari/537.36"
     )
+    DEFAULT_BASE_URL = "https://www.azair.eu"
     BASE_URL_TEMPLATE = (
-        "https://www.azair.eu/azfin.php?tp=0&searchtype=flexi&"
+        "{base_url}/azfin.php?tp=0&searchtype=flexi&"
         "srcAirport=Katowice+%5BKTW%5D+%28%2BKRK%2COSR%2CLCJ%2CWRO%29&"
         "srcTypedText=&srcFreeTypedText=&srcMC=&srcap0=KRK&srcap1=OSR&"
         "srcap2=LCJ&srcap3=WRO&srcFreeAirport=&"
@@ -38,43 +42,68 @@ class FlightsService:
         "isOneway=return&resultSubmit=Szukaj"
     )
     
-    def __init__(self, price_limit: float = DEFAULT_PRICE_LIMIT):
-        """Initialize the FlightsService with optional price limit."""
+    def __init__(self, price_limit: Optional[float] = DEFAULT_PRICE_LIMIT):
+        """
+        Initialize the FlightsService with optional price limit.
+
+        Pass price_limit=None to keep all flights, e.g. when deals are
+        detected against price history instead of a static threshold.
+        """
         self.url = self._generate_url()
         self.headers = {"User-Agent": self.USER_AGENT}
         self.price_limit = price_limit
     
-    def _generate_url(self) -> str:
-        """Generate URL with current date and current date + 3 months."""
-        today = datetime.now()
-        three_months_later = today + timedelta(days=90)  # Approximately 3 months
-        
+    def _generate_url(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> str:
+        """Generate URL for a date range (default: today + 3 months)."""
         # Format dates as d.m.yyyy (e.g., 18.8.2025)
-        depdate = today.strftime("%-d.%-m.%Y")
-        arrdate = three_months_later.strftime("%-d.%-m.%Y")
+        depdate, arrdate = self._get_date_range(start, end)
         
+        # AZAIR_BASE_URL lets the scraper target a local stand-in server
+        base_url = os.getenv('AZAIR_BASE_URL', self.DEFAULT_BASE_URL)
         return self.BASE_URL_TEMPLATE.format(
+            base_url=base_url.rstrip('/'),
             depdate=depdate,
             arrdate=arrdate
         )
     
-    def _get_date_range(self) -> tuple[str, str]:
+    def _get_date_range(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> tuple[str, str]:
         """Get the start and end dates used in the search."""
         today = datetime.now()
-        three_months_later = today + timedelta(days=90)
+        start = start or today
+        end = end or today + timedelta(days=self.SEARCH_DAYS)
         
         # Format dates as d.m.yyyy
-        start_date = today.strftime("%-d.%-m.%Y")
-        end_date = three_months_later.strftime("%-d.%-m.%Y")
+        start_date = start.strftime("%-d.%-m.%Y")
+        end_date = end.strftime("%-d.%-m.%Y")
         
         return start_date, end_date
     
-    def getFlights(self) -> FlightData:
+    def getFlights(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> FlightData:
+        """
+        Fetch flights departing and returning between start and end.
+
+        Without arguments the whole default search range is fetched.
+        """
+        url = self.url
+        if start or end:
+            url = self._generate_url(start, end)
         try:
             # Get the date information
-            start_date, end_date = self._get_date_range()
+            start_date, end_date = self._get_date_range(start, end)
             
-            response = requests.get(self.url, headers=self.headers)
+            response = requests.get(url, headers=self.headers)
             
             if response.status_code == 200:
                 flights = self._parse_flights(response.text)
@@ -85,7 +114,7 @@ class FlightsService:
                     flights=filtered_flights,
                     startDate=start_date,
                     endDate=end_date,
-                    url=self.url
+                    url=url
                 )
             else:
                 return FlightData(
@@ -94,18 +123,18 @@ class FlightsService:
                     flights=[],
                     startDate=start_date,
                     endDate=end_date,
-                    url=self.url
+                    url=url
                 )
         except Exception as e:
             # Get dates even in error case
-            start_date, end_date = self._get_date_range()
+            start_date, end_date = self._get_date_range(start, end)
             return FlightData(
                 status=500,
                 message=f"Error: {str(e)}",
                 flights=[],
                 startDate=start_date,
                 endDate=end_date,
-                url=self.url
+                url=url
             )
     
     def _parse_flights(self, html_content: str) -> List[Flight]:
@@ -153,7 +182,8 @@ class FlightsService:
             return_flight=return_flight,
             priceText=price_text,
             price=price,
-            destination=destination
+            destination=destination,
+            departureDate=self._extract_iso_date(start)
         )
     
     def _extract_journey_info(self, paragraph: Tag) -> [str, str]:
@@ -171,6 +201,11 @@ class FlightsService:
             return date_span.get_text(strip=True).replace("\xa0", " ")
         return ""
     
+    def _extract_iso_date(self, journey_text: str) -> str:
+        """Extract ISO travel date (yyyy-mm-dd) from journey text."""
+        date_match = re.search(r'\d{4}-\d{2}-\d{2}', journey_text)
+        return date_match.group(0) if date_match else ""
+    
     def _extract_location_info(self, paragraph: Tag, location_type: str) -> [str, str]:
         """Extract location information (time, city, airport code)."""
         span = paragraph.find("span", class_=location_type)
@@ -243,6 +278,8 @@ class FlightsService:
         return price_text, price
     
     def _filter_flights_by_price(self, flights: List[Flight]) -> List[Flight]:
+        if self.price_limit is None:
+            return flights
         filtered_flights = [
             flight
             for flight in flights
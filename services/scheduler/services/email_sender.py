@@ -13,6 +13,9 @@ class EmailSender:
         """Initialize EmailSender with config from environment variables."""
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        self.use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() != 'false'
+        # Seconds a single SMTP operation may block before it fails
+        self.timeout = float(os.getenv('SMTP_TIMEOUT', '60'))
         self.email_user = os.getenv('EMAIL_USER')
         self.email_password = os.getenv('EMAIL_PASSWORD')
         self.from_email = os.getenv('FROM_EMAIL', self.email_user)
@@ -24,6 +27,50 @@ class EmailSender:
                 "EMAIL_USER and EMAIL_PASSWORD environment variables required"
             )
     
+    def connect(self) -> smtplib.SMTP:
+        """
+        Open an authenticated SMTP connection.
+
+        The connection can send several messages and should be used as a
+        context manager so it is closed afterwards.
+        """
+        server = smtplib.SMTP(
+            self.smtp_server, self.smtp_port, timeout=self.timeout
+        )
+        try:
+            if self.use_tls:
+                server.starttls()  # Enable security
+            server.login(self.email_user, self.email_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def build_message(
+        self,
+        to_emails: List[str],
+        subject: str,
+        text_content: str,
+        html_content: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Build a multipart message with plain text and optional HTML."""
+        # Create message
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = f"{self.from_name} <{self.from_email}>"
+        message['To'] = ', '.join(to_emails)
+        
+        # Add plain text part
+        text_part = MIMEText(text_content, 'plain')
+        message.attach(text_part)
+        
+        # Add HTML part if provided
+        if html_content:
+            html_part = MIMEText(html_content, 'html')
+            message.attach(html_part)
+
+        return message
+
     def send_email(
         self,
         to_emails: List[str],
@@ -44,25 +91,12 @@ class EmailSender:
             bool: True if email was sent successfully, False otherwise
         """
         try:
-            # Create message
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = f"{self.from_name} <{self.from_email}>"
-            message['To'] = ', '.join(to_emails)
-            
-            # Add plain text part
-            text_part = MIMEText(text_content, 'plain')
-            message.attach(text_part)
-            
-            # Add HTML part if provided
-            if html_content:
-                html_part = MIMEText(html_content, 'html')
-                message.attach(html_part)
+            message = self.build_message(
+                to_emails, subject, text_content, html_content
+            )
 
             # Connect to server and send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()  # Enable security
-                server.login(self.email_user, self.email_password)
+            with self.connect() as server:
                 server.send_message(message)
 
             logging.info(f"Email sent to {', '.join(to_emails)}")
@@ -97,6 +131,34 @@ class EmailSender:
         if not flights:
             return True  # No flights to report
 
+        subject, text_content, html_content = self.compose_flight_alert(
+            flights, date_range, source_url, ai_destination_content
+        )
+        return self.send_email(to_emails, subject, text_content, html_content)
+
+    @staticmethod
+    def compose_flight_alert(
+        flights: List[dict],
+        date_range: str,
+        source_url: Optional[str] = None,
+        ai_destination_content: Optional[str] = None
+    ) -> tuple[str, str, str]:
+        """
+        Compose the subject, text and HTML content of a flight alert.
+
+        Needs no SMTP credentials, so alerts can be composed by the
+        scrape job and delivered later by the outbox worker.
+
+        Args:
+            flights: List of flight dictionaries
+            date_range: Date range for the search
+            source_url: Optional URL to the flight search results
+            ai_destination_content: Optional AI-generated destination 
+                descriptions
+
+        Returns:
+            tuple: (subject, text_content, html_content)
+        """
         subject = f"✈️ Flight Alert: {len(flights)} flights found"
 
         # Create text content
@@ -181,7 +243,7 @@ display: inline-block; font-weight: bold;">
 <p style="color: #7f8c8d;">Happy travels! ✈️</p>
 </body></html>"""
 
-        return self.send_email(to_emails, subject, text_content, html_content)
+        return subject, text_content, html_content
 
     def send_simple_alert(self, to_emails: List[str], message: str) -> bool:
         """
@@ -0,0 +1,394 @@
+"""
+Price History Service - columnar flight price history and deal scoring.
+
+Every run appends its flights to a set of append-only column files
+(one raw NumPy array per column) that are memory-mapped on read, so
+scoring stays fast over years of snapshots.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.flight import Flight
+
+
+def itinerary_key(flight: Flight) -> int:
+    """
+    Return a stable 64-bit key of a flight's itinerary.
+
+    The departure and return legs carry dates, times and airports, so two
+    fares for the same day from different origins or with different stays
+    get different keys.
+    """
+    digest = hashlib.blake2b(
+        f"{flight.start}\n{flight.return_flight}".encode("utf-8"),
+        digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class PriceHistoryStore:
+    """Append-only columnar store of observed flight prices."""
+
+    DEFAULT_DIRECTORY = "data/price-history"
+    VOCABULARY_FILE = "destinations.json"
+    COLUMNS = {
+        "observed_at": np.dtype("<i8"),  # Unix seconds of the run
+        "destination": np.dtype("<i4"),  # Index into destination vocabulary
+        "travel_date": np.dtype("<i4"),  # Days since 1970-01-01
+        "itinerary": np.dtype("<i8"),  # itinerary_key() of the flight
+        "price": np.dtype("<f8"),
+    }
+
+    def __init__(self, directory: Optional[str] = None):
+        """Initialize the store, creating its directory if needed."""
+        self.directory = directory or os.getenv(
+            'PRICE_HISTORY_DIR', self.DEFAULT_DIRECTORY
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self.destinations = self._load_vocabulary()
+        self._codes = {name: i for i, name in enumerate(self.destinations)}
+
+    def _column_path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.bin")
+
+    def _load_vocabulary(self) -> List[str]:
+        path = os.path.join(self.directory, self.VOCABULARY_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as vocabulary_file:
+            return json.load(vocabulary_file)
+
+    def _save_vocabulary(self) -> None:
+        path = os.path.join(self.directory, self.VOCABULARY_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as vocabulary_file:
+            json.dump(self.destinations, vocabulary_file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def destination_code(self, destination: str) -> int:
+        """Return the code of a destination, or -1 if it was never seen."""
+        return self._codes.get(destination, -1)
+
+    def _register_destination(self, destination: str) -> int:
+        code = self._codes.get(destination)
+        if code is None:
+            code = len(self.destinations)
+            self.destinations.append(destination)
+            self._codes[destination] = code
+        return code
+
+    def __len__(self) -> int:
+        # A partially written run leaves columns of unequal length;
+        # only rows present in every column are considered valid.
+        rows = []
+        for column, dtype in self.COLUMNS.items():
+            path = self._column_path(column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows.append(size // dtype.itemsize)
+        return min(rows)
+
+    def append(
+        self,
+        flights: List[Flight],
+        observed_at: Optional[datetime] = None
+    ) -> int:
+        """
+        Append flights observed in a single run.
+
+        Args:
+            flights: Flights returned by the scraper
+            observed_at: Time of the run (default: now)
+
+        Returns:
+            int: Number of rows appended
+        """
+        flights = [flight for flight in flights if flight.departureDate]
+        if not flights:
+            return 0
+
+        vocabulary_size = len(self.destinations)
+        codes = [self._register_destination(f.destination) for f in flights]
+        if len(self.destinations) != vocabulary_size:
+            self._save_vocabulary()
+
+        observed_at = observed_at or datetime.now()
+        rows = len(self)
+        columns = {
+            "observed_at": np.full(
+                len(flights), int(observed_at.timestamp())
+            ),
+            "destination": np.asarray(codes),
+            "travel_date": np.asarray(
+                [f.departureDate for f in flights], dtype="datetime64[D]"
+            ).astype(np.int64),
+            "itinerary": np.asarray(
+                [itinerary_key(f) for f in flights], dtype=np.int64
+            ),
+            "price": np.asarray([f.price for f in flights]),
+        }
+        for column, dtype in self.COLUMNS.items():
+            path = self._column_path(column)
+            with open(path, "ab") as column_file:
+                # Drop any torn tail left behind by an interrupted run
+                column_file.truncate(rows * dtype.itemsize)
+                column_file.write(columns[column].astype(dtype).tobytes())
+        return len(flights)
+
+    def load(self, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Return columns as read-only memory-mapped arrays.
+
+        Args:
+            since: Only return rows observed at or after this Unix time.
+                Runs append in time order, so observed_at is sorted and
+                the slice is found by binary search without a full scan.
+        """
+        rows = len(self)
+        columns = {}
+        for column, dtype in self.COLUMNS.items():
+            if rows == 0:
+                columns[column] = np.empty(0, dtype=dtype)
+            else:
+                columns[column] = np.memmap(
+                    self._column_path(column),
+                    dtype=dtype,
+                    mode="r",
+                    shape=(rows,)
+                )
+        if since is not None and rows:
+            start = int(np.searchsorted(columns["observed_at"], since, "left"))
+            columns = {name: data[start:] for name, data in columns.items()}
+        return columns
+
+
+def _group_scores(
+    groups: np.ndarray,
+    values: np.ndarray,
+    query_groups: np.ndarray,
+    query_values: np.ndarray,
+    group_count: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score query values against the values of their group, vectorized.
+
+    Groups are integer ids in [0, group_count); a query group of -1 has
+    no history.
+
+    Returns:
+        Tuple of (samples, mean, percentile, zscore) per query. The
+        percentile is
+        the mid-rank: ties count half, so a price equal to its whole history
+        sits at 0.5. Means and scores are NaN without history; the z-score
+        is also NaN for a price equal to a constant history.
+    """
+    if not group_count:
+        nan = np.full(len(query_groups), np.nan)
+        samples = np.zeros(len(query_groups), dtype=np.int64)
+        return samples, nan, nan.copy(), nan.copy()
+
+    known = query_groups >= 0
+    lookup = np.where(known, query_groups, 0)
+    counts = np.bincount(groups, minlength=group_count)
+    sums = np.bincount(groups, weights=values, minlength=group_count)
+    squares = np.bincount(groups, weights=values ** 2, minlength=group_count)
+    samples = np.where(known, counts[lookup], 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(squares / counts - means ** 2, 0.0))
+        query_means = np.where(samples > 0, means[lookup], np.nan)
+        zscores = (query_values - query_means) / stds[lookup]
+
+    # Offset each group into its own value band so one sorted array and
+    # searchsorted rank every query within its group at once
+    span = max(values.max(initial=0.0), query_values.max(initial=0.0)) + 1.0
+    sorted_keys = np.sort(groups * span + values)
+    query_keys = lookup * span + query_values
+    group_start = np.searchsorted(sorted_keys, lookup * span, "left")
+    below = np.searchsorted(sorted_keys, query_keys, "left") - group_start
+    at_or_below = (
+        np.searchsorted(sorted_keys, query_keys, "right") - group_start
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentiles = np.where(
+            samples > 0, (below + at_or_below) / 2 / samples, np.nan
+        )
+    return samples, query_means, percentiles, zscores
+
+
+class DealDetector:
+    """
+    Detect deals relative to their own price history.
+
+    A flight is compared with earlier prices of the same trip (the same
+    departure and return flights), so a fare that has simply not changed is
+    not a deal. Trips without enough history are compared with the
+    destination's other trips, each trip counted once by its mean price so
+    that fares seen again on every run do not dominate. In both cases a
+    price must also be noticeably below the baseline mean, so a flat
+    history does not turn every small dip into a deal.
+    """
+
+    DEFAULT_LOOKBACK_DAYS = 180
+    DEFAULT_MIN_TRIP_SAMPLES = 5
+    DEFAULT_MIN_SAMPLES = 10
+    DEFAULT_MAX_PERCENTILE = 0.2
+    DEFAULT_MAX_ZSCORE = -1.0
+    DEFAULT_MIN_DISCOUNT = 0.05
+
+    def __init__(
+        self,
+        store: PriceHistoryStore,
+        fallback_price_limit: float,
+        lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+        min_trip_samples: int = DEFAULT_MIN_TRIP_SAMPLES,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        max_percentile: float = DEFAULT_MAX_PERCENTILE,
+        max_zscore: float = DEFAULT_MAX_ZSCORE,
+        min_discount: float = DEFAULT_MIN_DISCOUNT
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            store: Price history to score against
+            fallback_price_limit: Static limit used when neither the trip
+                nor the destination has enough history
+            lookback_days: Only observations this recent are considered
+            min_trip_samples: Observations of the same trip needed before
+                its own history is trusted
+            min_samples: Trips of a destination needed before the
+                destination history is trusted
+            max_percentile: A price at or below this percentile is a deal
+            max_zscore: A price at or below this z-score is a deal
+            min_discount: Share below the baseline mean a price must be
+                for either test to count
+        """
+        self.store = store
+        self.fallback_price_limit = fallback_price_limit
+        self.lookback_days = lookback_days
+        self.min_trip_samples = min_trip_samples
+        self.min_samples = min_samples
+        self.max_percentile = max_percentile
+        self.max_zscore = max_zscore
+        self.min_discount = min_discount
+
+    def score(
+        self,
+        flights: List[Flight],
+        now: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score flights against their trip and destination history.
+
+        Returns:
+            Dictionary of per-flight arrays: trip_samples, trip_mean,
+            trip_percentile and trip_zscore against earlier prices of the
+            same trip; samples, mean, percentile and zscore against the
+            destination's per-trip mean prices.
+        """
+        now = now or datetime.now()
+        cutoff = int(now.timestamp()) - self.lookback_days * 86400
+        history = self.store.load(since=cutoff)
+
+        hist_codes = np.asarray(history["destination"], np.int64)
+        hist_trips = np.asarray(history["itinerary"], np.int64)
+        hist_prices = np.asarray(history["price"], np.float64)
+
+        codes = np.array(
+            [self.store.destination_code(f.destination) for f in flights],
+            dtype=np.int64
+        )
+        trips = np.array([itinerary_key(f) for f in flights], dtype=np.int64)
+        prices = np.array([f.price for f in flights], dtype=np.float64)
+
+        # Number trips densely; first_rows gives each trip's destination
+        trip_keys, first_rows, trip_ids = np.unique(
+            hist_trips, return_index=True, return_inverse=True
+        )
+        query_trips = np.full(len(flights), -1)
+        if len(trip_keys):
+            position = np.minimum(
+                np.searchsorted(trip_keys, trips), len(trip_keys) - 1
+            )
+            found = (codes >= 0) & (trip_keys[position] == trips)
+            query_trips = np.where(found, position, -1)
+        trip_samples, trip_means, trip_percentiles, trip_zscores = (
+            _group_scores(
+                trip_ids, hist_prices, query_trips, prices, len(trip_keys)
+            )
+        )
+
+        # Destination baseline: one mean price per trip
+        trip_counts = np.bincount(trip_ids, minlength=len(trip_keys))
+        trip_history_means = np.bincount(
+            trip_ids, weights=hist_prices, minlength=len(trip_keys)
+        ) / np.maximum(trip_counts, 1)
+        samples, means, percentiles, zscores = _group_scores(
+            hist_codes[first_rows],
+            trip_history_means,
+            codes,
+            prices,
+            len(self.store.destinations)
+        )
+
+        return {
+            "trip_samples": trip_samples,
+            "trip_mean": trip_means,
+            "trip_percentile": trip_percentiles,
+            "trip_zscore": trip_zscores,
+            "samples": samples,
+            "mean": means,
+            "percentile": percentiles,
+            "zscore": zscores,
+        }
+
+    def _is_deal(
+        self,
+        prices: np.ndarray,
+        means: np.ndarray,
+        percentiles: np.ndarray,
+        zscores: np.ndarray
+    ) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return (prices <= means * (1 - self.min_discount)) & (
+                (percentiles <= self.max_percentile)
+                | (zscores <= self.max_zscore)
+            )
+
+    def find_deals(
+        self,
+        flights: List[Flight],
+        now: Optional[datetime] = None
+    ) -> List[Flight]:
+        """Return flights that are cheap relative to their own history."""
+        if not flights:
+            return []
+
+        scores = self.score(flights, now)
+        prices = np.array([f.price for f in flights], dtype=np.float64)
+        is_deal = np.where(
+            scores["trip_samples"] >= self.min_trip_samples,
+            self._is_deal(
+                prices,
+                scores["trip_mean"],
+                scores["trip_percentile"],
+                scores["trip_zscore"]
+            ),
+            np.where(
+                scores["samples"] >= self.min_samples,
+                self._is_deal(
+                    prices,
+                    scores["mean"],
+                    scores["percentile"],
+                    scores["zscore"]
+                ),
+                prices < self.fallback_price_limit
+            )
+        )
+        return [flight for flight, deal in zip(flights, is_deal) if deal]
@@ -0,0 +1,247 @@
+"""
+Refresh Scheduler - decides which date windows to re-scrape on each run.
+
+The search range is split into fixed calendar windows. How often prices
+changed in each window is learned from the price history, and a window
+is refetched only once it is probably stale, within a per-run budget.
+"""
+import json
+import math
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.search_window import SearchWindow
+from services.price_history import PriceHistoryStore
+
+
+class RefreshScheduler:
+    """Volatility-aware planner for incremental search window refreshes."""
+
+    STATE_FILE = "refresh-state.json"
+    DEFAULT_WINDOW_DAYS = 7
+    DEFAULT_BUDGET = 4
+    DEFAULT_THRESHOLD = 0.5
+    DEFAULT_LOOKBACK_DAYS = 30
+    # Assumed price changes per hour for windows without enough history
+    DEFAULT_PRIOR_RATE = 1 / 24
+    # Calm windows are still refreshed every few days
+    DEFAULT_MIN_RATE = 1 / 168
+
+    def __init__(
+        self,
+        store: PriceHistoryStore,
+        search_days: int,
+        window_days: Optional[int] = None,
+        budget: Optional[int] = None,
+        threshold: Optional[float] = None,
+        lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+        prior_rate: float = DEFAULT_PRIOR_RATE,
+        min_rate: float = DEFAULT_MIN_RATE
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            store: Price history used to learn per-window change rates
+            search_days: Length of the whole search range from today
+            window_days: Days per window (env REFRESH_WINDOW_DAYS)
+            budget: Max windows fetched per run (env REFRESH_BUDGET)
+            threshold: Minimum staleness, the probability that prices
+                changed since the last fetch, for a window to be
+                refetched (env REFRESH_STALENESS_THRESHOLD)
+            lookback_days: Only observations this recent are used
+            prior_rate: Change rate assumed for windows with no history
+            min_rate: Lower bound for learned change rates
+        """
+        self.store = store
+        self.search_days = search_days
+        self.window_days = window_days or int(
+            os.getenv('REFRESH_WINDOW_DAYS', self.DEFAULT_WINDOW_DAYS)
+        )
+        self.budget = budget or int(
+            os.getenv('REFRESH_BUDGET', self.DEFAULT_BUDGET)
+        )
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv('REFRESH_STALENESS_THRESHOLD', self.DEFAULT_THRESHOLD)
+        )
+        self.lookback_days = lookback_days
+        self.prior_rate = prior_rate
+        self.min_rate = min_rate
+        self.state_path = os.path.join(store.directory, self.STATE_FILE)
+        self.last_fetched = self._load_state()
+
+    def _load_state(self) -> Dict[int, int]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as state_file:
+            state = json.load(state_file)
+        if state.get("window_days") != self.window_days:
+            return {}  # Window boundaries changed, start over
+        return {int(k): v for k, v in state["last_fetched"].items()}
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as state_file:
+            json.dump({
+                "window_days": self.window_days,
+                "last_fetched": self.last_fetched,
+            }, state_file)
+        os.replace(tmp_path, self.state_path)
+
+    def _window_id(self, day: date) -> int:
+        days = (day - date(1970, 1, 1)).days
+        return days // self.window_days
+
+    def _pooled_rates(
+        self,
+        keys: np.ndarray,
+        changed: np.ndarray,
+        interval_hours: np.ndarray
+    ) -> Dict[int, float]:
+        """Estimate one change rate per key from its pooled checks."""
+        if not len(keys):
+            return {}
+        key_ids, inverse = np.unique(keys, return_inverse=True)
+        checks = np.bincount(inverse)
+        changes = np.bincount(inverse, weights=changed)
+        mean_interval = np.bincount(inverse, weights=interval_hours) / checks
+
+        # Poisson change-rate estimate from "changed or not" checks
+        # (Cho & Garcia-Molina); unlike changes / elapsed time it does not
+        # saturate at one change per fetch
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = -np.log(
+                (checks - changes + 0.5) / (checks + 0.5)
+            ) / mean_interval
+        rates = np.maximum(
+            np.nan_to_num(rates, nan=self.min_rate, posinf=self.prior_rate),
+            self.min_rate
+        )
+        return dict(zip(key_ids.tolist(), rates.tolist()))
+
+    def change_rates(
+        self,
+        now: Optional[datetime] = None
+    ) -> tuple[Dict[int, float], Dict[int, float]]:
+        """
+        Estimate price changes per hour from recent history.
+
+        Each pair of consecutive runs that saw a destination in a window
+        is one check; it is a change if the destination's cheapest price
+        differs. Checks are pooled per window and, to capture that dates
+        get more volatile as they approach, per lead time in windows
+        between the check and the travel dates.
+
+        Returns:
+            Tuple of (rates by window id, rates by lead in windows).
+            Keys without any check are omitted.
+        """
+        now = now or datetime.now()
+        cutoff = int(now.timestamp()) - self.lookback_days * 86400
+        history = self.store.load(since=cutoff)
+        if not len(history["observed_at"]):
+            return {}, {}
+
+        observed = np.asarray(history["observed_at"], np.int64)
+        prices = np.asarray(history["price"], np.float64)
+        windows = (
+            np.asarray(history["travel_date"], np.int64) // self.window_days
+        )
+        destinations = max(len(self.store.destinations), 1)
+        groups = windows * destinations + history["destination"]
+
+        order = np.lexsort((observed, groups))
+        groups = groups[order]
+        observed = observed[order]
+        prices = prices[order]
+
+        # One snapshot per (window, destination, run): its cheapest price
+        boundary = np.ones(len(groups), dtype=bool)
+        boundary[1:] = (
+            (groups[1:] != groups[:-1]) | (observed[1:] != observed[:-1])
+        )
+        starts = np.flatnonzero(boundary)
+        snap_groups = groups[starts]
+        snap_observed = observed[starts]
+        snap_prices = np.minimum.reduceat(prices, starts)
+
+        # Consecutive snapshots of the same destination form a check
+        same = snap_groups[1:] == snap_groups[:-1]
+        changed = (snap_prices[1:] != snap_prices[:-1])[same]
+        interval_hours = (np.diff(snap_observed) / 3600)[same]
+        check_windows = snap_groups[1:][same] // destinations
+        check_leads = check_windows - (
+            snap_observed[1:][same] // 86400 // self.window_days
+        )
+
+        return (
+            self._pooled_rates(check_windows, changed, interval_hours),
+            self._pooled_rates(check_leads, changed, interval_hours),
+        )
+
+    def windows(self, now: Optional[datetime] = None) -> List[SearchWindow]:
+        """Return every window in the search range with its staleness."""
+        now = now or datetime.now()
+        today = now.date()
+        last_day = today + timedelta(days=self.search_days)
+        window_rates, lead_rates = self.change_rates(now)
+
+        result = []
+        current = self._window_id(today)
+        for window_id in range(current, self._window_id(last_day) + 1):
+            first_day = date(1970, 1, 1) + timedelta(
+                days=window_id * self.window_days
+            )
+            start = max(first_day, today)
+            end = min(first_day + timedelta(days=self.window_days - 1),
+                      last_day)
+
+            fetched_at = self.last_fetched.get(window_id)
+            if fetched_at is None:
+                staleness = 1.0
+            else:
+                age_hours = max(now.timestamp() - fetched_at, 0) / 3600
+                # A calm window still refreshes as it nears departure
+                rate = max(
+                    window_rates.get(window_id, 0.0),
+                    lead_rates.get(window_id - current, 0.0)
+                ) or self.prior_rate
+                staleness = 1 - math.exp(-rate * age_hours)
+
+            result.append(SearchWindow(
+                windowId=window_id,
+                startDate=start,
+                endDate=end,
+                staleness=staleness
+            ))
+        return result
+
+    def plan(self, now: Optional[datetime] = None) -> List[SearchWindow]:
+        """Return the stalest windows due for refresh, up to the budget."""
+        due = [
+            window for window in self.windows(now)
+            if window.staleness >= self.threshold
+        ]
+        # Stalest first; nearer dates win ties
+        due.sort(key=lambda window: (-window.staleness, window.windowId))
+        return sorted(due[:self.budget], key=lambda window: window.windowId)
+
+    def mark_fetched(
+        self,
+        windows: List[SearchWindow],
+        now: Optional[datetime] = None
+    ) -> None:
+        """Record successful fetches and drop windows already in the past."""
+        now = now or datetime.now()
+        current = self._window_id(now.date())
+        for window in windows:
+            self.last_fetched[window.windowId] = int(now.timestamp())
+        self.last_fetched = {
+            window_id: fetched_at
+            for window_id, fetched_at in self.last_fetched.items()
+            if window_id >= current
+        }
+        self._save_state()
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from loadtest.azair_stub import AzairStubServer
+from services.ai_destinations import AIDestinationsService
+
+DESTINATIONS = ["Londyn", "Mediolan", "Paryż", "Bolonia", "Liverpool"]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Point the OpenAI client at the local stub; yields the stub."""
+    server = AzairStubServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{server.base_url}/v1")
+    yield server
+    server.shutdown()
+
+
+def test_every_destination_is_described_in_order(stub, monkeypatch):
+    monkeypatch.setenv("AI_CHUNK_SIZE", "2")
+
+    info = AIDestinationsService().get_destinations_info(DESTINATIONS)
+
+    assert list(info) == DESTINATIONS
+    assert info["Paryż"] == "Paryż: Opis. Zabawny fakt."
+    assert stub.stats["requests"] == 3
+
+
+@pytest.mark.parametrize("value", ["0", "-3"])
+def test_non_positive_chunking_settings_fall_back_to_one(
+    stub, monkeypatch, value
+):
+    monkeypatch.setenv("AI_CHUNK_SIZE", value)
+    monkeypatch.setenv("AI_MAX_CONCURRENCY", value)
+
+    service = AIDestinationsService()
+    info = service.get_destinations_info(DESTINATIONS)
+
+    assert (service.chunk_size, service.max_concurrency) == (1, 1)
+    assert list(info) == DESTINATIONS
+
+
+def test_slow_chunks_time_out_to_fallback_text(stub, monkeypatch):
+    stub.latency = 2.0
+    monkeypatch.setenv("AI_TIMEOUT", "0.2")
+
+    start = time.perf_counter()
+    info = AIDestinationsService().get_destinations_info(["Londyn"])
+
+    assert info == {"Londyn": f"Londyn: {AIDestinationsService.FAILED_TEXT}"}
+    assert time.perf_counter() - start < 2.0
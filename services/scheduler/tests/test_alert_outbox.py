@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from loadtest.smtp_sink import SMTPSink
+from models.flight import Flight
+from services.alert_outbox import AlertOutbox, OutboxWorker
+from services.email_sender import EmailSender
+
+RECIPIENTS = ["alerts@example.com"]
+
+
+def _flight(price: float = 199.0) -> Flight:
+    return Flight(
+        start="Pt 2025-10-03 18:30 Kraków (KRK) → 19:45 Londyn (LTN)",
+        return_flight="Pn 2025-10-06 20:25 Londyn (LTN) → Kraków (KRK)",
+        priceText=f"{price:.0f} zł",
+        price=price,
+        destination="Londyn",
+        departureDate="2025-10-03"
+    )
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return AlertOutbox(str(tmp_path / "outbox.sqlite3"))
+
+
+@pytest.fixture
+def smtp_env(monkeypatch):
+    """Point EmailSender at a local SMTP sink; yields the sink."""
+    sink = SMTPSink(("127.0.0.1", 0))
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    monkeypatch.setenv("EMAIL_USER", "sender@example.com")
+    monkeypatch.setenv("EMAIL_PASSWORD", "secret")
+    monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(sink.server_address[1]))
+    monkeypatch.setenv("SMTP_USE_TLS", "false")
+    monkeypatch.setenv("SMTP_TIMEOUT", "5")
+    yield sink
+    sink.shutdown()
+
+
+def _enqueue(outbox, flights, ai_text="Londyn: Opis miejsca."):
+    subject, text_content, html_content = EmailSender.compose_flight_alert(
+        flights, "2025-10-01 - 2025-10-07", "https://example.com", ai_text
+    )
+    return outbox.enqueue(
+        AlertOutbox.flight_alert_key(RECIPIENTS, flights),
+        RECIPIENTS,
+        subject,
+        text_content,
+        html_content
+    )
+
+
+def test_same_deals_with_different_ai_text_queue_once(outbox):
+    assert _enqueue(outbox, [_flight()], "Londyn: Opis miejsca.")
+    assert not _enqueue(outbox, [_flight()], "Londyn: Inny opis.")
+    assert outbox.counts() == {"pending": 1}
+
+
+def test_new_price_is_a_new_alert(outbox):
+    assert _enqueue(outbox, [_flight(199.0)])
+    assert _enqueue(outbox, [_flight(179.0)])
+    assert outbox.counts() == {"pending": 2}
+
+
+def test_alert_key_ignores_order():
+    flights = [_flight(199.0), _flight(179.0)]
+    assert AlertOutbox.flight_alert_key(
+        ["b@example.com", "a@example.com"], flights
+    ) == AlertOutbox.flight_alert_key(
+        ["a@example.com", "b@example.com"], flights[::-1]
+    )
+
+
+def test_worker_delivers_queued_alerts(outbox, smtp_env):
+    _enqueue(outbox, [_flight(199.0)])
+    _enqueue(outbox, [_flight(179.0)])
+
+    delivered = OutboxWorker(outbox, EmailSender()).drain()
+
+    assert delivered == 2
+    assert outbox.counts() == {"sent": 2}
+    assert smtp_env.messages == 2
+
+
+def test_connect_failure_does_not_use_attempts(outbox, monkeypatch, smtp_env):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        closed_port = unused.getsockname()[1]
+    monkeypatch.setenv("SMTP_PORT", str(closed_port))
+    _enqueue(outbox, [_flight()])
+
+    OutboxWorker(outbox, EmailSender()).drain()
+
+    assert outbox.counts() == {"pending": 1}
+    with outbox._connect() as connection:
+        attempts, last_error = connection.execute(
+            "SELECT attempts, last_error FROM outbox"
+        ).fetchone()
+    assert attempts == 0
+    assert last_error.startswith("connect:")
+
+
+def test_dead_messages_can_be_requeued(tmp_path):
+    outbox = AlertOutbox(str(tmp_path / "outbox.sqlite3"), max_attempts=2)
+    _enqueue(outbox, [_flight()])
+    for _ in range(2):
+        [message] = outbox.claim_batch(10)
+        outbox.mark_failed(message, "550 rejected")
+        # Skip the backoff
+        with outbox._connect() as connection:
+            connection.execute("UPDATE outbox SET next_attempt_at = 0")
+
+    assert outbox.counts() == {"dead": 1}
+    assert outbox.requeue_dead() == 1
+    [message] = outbox.claim_batch(10)
+    assert message.attempts == 0
+
+
+def test_late_update_after_lease_expiry_is_dropped(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    slow_worker = AlertOutbox(path, lease_seconds=0.05)
+    _enqueue(slow_worker, [_flight()])
+    [stale] = slow_worker.claim_batch(10)
+    time.sleep(0.1)
+    [current] = AlertOutbox(path).claim_batch(10)
+
+    assert current.id == stale.id
+    assert not slow_worker.mark_failed(stale, "timed out")
+    assert slow_worker.counts() == {"sending": 1}
+    assert slow_worker.mark_sent(current)
+    assert not slow_worker.mark_sent(stale)
+    assert slow_worker.counts() == {"sent": 1}
+
+
+def test_smtp_timeout_must_fit_in_lease(outbox, monkeypatch, smtp_env):
+    monkeypatch.setenv("SMTP_TIMEOUT", str(outbox.lease_seconds))
+
+    with pytest.raises(ValueError):
+        OutboxWorker(outbox, EmailSender())
@@ -0,0 +1,180 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models.flight import Flight
+from services.azair_scraper import FlightsService
+from services.price_history import (
+    DealDetector,
+    PriceHistoryStore,
+    _group_scores,
+)
+
+EXAMPLE_RESULTS = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..",
+    "response-examples", "results.html"
+)
+START = datetime(2025, 9, 1, 12)
+
+
+def _flight(
+    price: float,
+    destination: str = "Londyn",
+    day: str = "2025-10-03",
+    origin: str = "Kraków (KRK)",
+    stay_end: str = "2025-10-06"
+) -> Flight:
+    return Flight(
+        start=f"Pt {day} 18:30 {origin} → 19:45 {destination} (LTN)",
+        return_flight=f"Pn {stay_end} 20:25 {destination} (LTN) → {origin}",
+        priceText=f"{price:.0f} zł",
+        price=price,
+        destination=destination,
+        departureDate=day
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceHistoryStore(str(tmp_path))
+
+
+def _replay(store, detector, flights, runs):
+    """Score and record the same flights once per run, 6 hours apart."""
+    found = []
+    for run in range(runs):
+        now = START + timedelta(hours=6 * run)
+        found.append(detector.find_deals(flights, now))
+        store.append(flights, now)
+    return found
+
+
+def _brute_force_scores(groups, values, group, value):
+    history = values[groups == group] if group >= 0 else values[:0]
+    if not len(history):
+        return 0, np.nan, np.nan, np.nan
+    below = np.sum(history < value)
+    at_or_below = np.sum(history <= value)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscore = (value - history.mean()) / history.std()
+    return (
+        len(history),
+        history.mean(),
+        (below + at_or_below) / 2 / len(history),
+        zscore,
+    )
+
+
+def test_group_scores_match_brute_force_ranks():
+    rng = np.random.default_rng(7)
+    # Group 3 has no values and group 4 a constant history
+    groups = np.concatenate([rng.integers(0, 3, 200), np.full(5, 4)])
+    values = np.concatenate([
+        rng.integers(100, 120, 200).astype(np.float64), np.full(5, 150.0)
+    ])
+    query_groups = np.array([0, 0, 1, 2, 2, 3, 4, 4, -1])
+    query_values = np.array(
+        [99.0, 110.0, 119.0, 105.0, 125.0, 110.0, 150.0, 140.0, 110.0]
+    )
+
+    scores = _group_scores(groups, values, query_groups, query_values, 5)
+
+    expected = np.array([
+        _brute_force_scores(groups, values, group, value)
+        for group, value in zip(query_groups, query_values)
+    ]).T
+    for actual, wanted in zip(scores, expected):
+        np.testing.assert_allclose(actual, wanted, equal_nan=True)
+
+
+def test_group_scores_without_history():
+    samples, means, percentiles, zscores = _group_scores(
+        np.empty(0, np.int64), np.empty(0), np.array([-1, -1]),
+        np.array([100.0, 200.0]), 0
+    )
+    assert samples.tolist() == [0, 0]
+    assert np.isnan(means).all()
+    assert np.isnan(percentiles).all()
+    assert np.isnan(zscores).all()
+
+
+def test_load_since_skips_older_runs(store):
+    for run in range(4):
+        store.append([_flight(100.0 + run)], START + timedelta(hours=run))
+
+    recent = store.load(since=int((START + timedelta(hours=2)).timestamp()))
+
+    assert recent["price"].tolist() == [102.0, 103.0]
+
+
+def test_replayed_example_runs_are_not_deals_once_trips_have_history(store):
+    with open(EXAMPLE_RESULTS, encoding="utf-8") as results_file:
+        flights = FlightsService(price_limit=None)._parse_flights(
+            results_file.read()
+        )
+    detector = DealDetector(store, fallback_price_limit=300)
+
+    found = _replay(store, detector, flights, runs=10)
+
+    assert found[0]  # Cold start falls back to the static limit
+    assert found[detector.min_trip_samples:] == [[]] * (
+        10 - detector.min_trip_samples
+    )
+
+
+def test_itineraries_on_the_same_day_are_scored_separately(store):
+    cheap = _flight(167.0, origin="Wrocław (WRO)")
+    dear = _flight(358.0, origin="Kraków (KRK)")
+    longer_stay = _flight(250.0, origin="Kraków (KRK)", stay_end="2025-10-07")
+    detector = DealDetector(store, fallback_price_limit=0)
+
+    found = _replay(store, detector, [cheap, dear, longer_stay], runs=8)
+
+    assert found == [[]] * 8
+
+
+def test_small_dip_below_flat_history_is_not_a_deal(store):
+    detector = DealDetector(store, fallback_price_limit=0)
+    _replay(store, detector, [_flight(400.0)], runs=6)
+    now = START + timedelta(days=2)
+
+    assert detector.find_deals([_flight(399.0)], now) == []
+    assert detector.find_deals([_flight(370.0)], now) == [_flight(370.0)]
+
+
+def test_price_drop_against_trip_history_is_a_deal(store):
+    detector = DealDetector(store, fallback_price_limit=0)
+    for run, price in enumerate([400.0, 450.0, 420.0, 440.0, 410.0, 430.0]):
+        store.append([_flight(price)], START + timedelta(hours=6 * run))
+    now = START + timedelta(days=2)
+
+    assert detector.find_deals([_flight(330.0)], now) == [_flight(330.0)]
+    assert detector.find_deals([_flight(425.0)], now) == []
+
+
+def test_new_trip_is_scored_against_destination_trips(store):
+    detector = DealDetector(store, fallback_price_limit=1000)
+    trips = [
+        _flight(400.0 + 10 * i, day=f"2025-10-{i + 1:02d}",
+                stay_end=f"2025-10-{i + 4:02d}")
+        for i in range(detector.min_samples)
+    ]
+    store.append(trips, START)
+    now = START + timedelta(hours=6)
+
+    new_trip = _flight(350.0, day="2025-11-01", stay_end="2025-11-04")
+    usual_trip = _flight(460.0, day="2025-11-01", stay_end="2025-11-04")
+
+    assert detector.find_deals([new_trip], now) == [new_trip]
+    # Below the static limit, but not cheap for this destination
+    assert detector.find_deals([usual_trip], now) == []
+
+
+def test_cold_start_uses_fallback_price_limit(store):
+    detector = DealDetector(store, fallback_price_limit=300)
+
+    found = detector.find_deals([_flight(299.0), _flight(301.0)], START)
+
+    assert found == [_flight(299.0)]
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.flight import Flight
+from services.price_history import PriceHistoryStore
+from services.refresh_scheduler import RefreshScheduler
+
+NOW = datetime(2025, 9, 1, 12)
+
+
+def _flight(day: str, price: float) -> Flight:
+    return Flight(
+        start=f"{day} 18:30 Kraków (KRK) → 19:45 Londyn (LTN)",
+        return_flight="Londyn (LTN) → Kraków (KRK)",
+        priceText=f"{price:.0f} zł",
+        price=price,
+        destination="Londyn",
+        departureDate=day
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceHistoryStore(str(tmp_path))
+
+
+def _scheduler(store, budget=3, threshold=0.5):
+    return RefreshScheduler(
+        store,
+        search_days=90,
+        window_days=7,
+        budget=budget,
+        threshold=threshold
+    )
+
+
+def test_unfetched_windows_are_planned_nearest_first_within_budget(store):
+    scheduler = _scheduler(store, budget=3)
+
+    windows = scheduler.windows(NOW)
+    planned = scheduler.plan(NOW)
+
+    assert all(window.staleness == 1.0 for window in windows)
+    assert planned == windows[:3]
+    assert planned[0].startDate == NOW.date()
+
+
+def test_fresh_windows_are_not_planned_until_stale(store):
+    scheduler = _scheduler(store, budget=100)
+    scheduler.mark_fetched(scheduler.windows(NOW), NOW)
+
+    assert scheduler.plan(NOW + timedelta(hours=1)) == []
+    # The prior of one change a day makes windows stale after ~17 hours
+    assert len(scheduler.plan(NOW + timedelta(days=1))) == len(
+        scheduler.windows(NOW + timedelta(days=1))
+    )
+
+
+def test_threshold_keeps_windows_below_it(store):
+    scheduler = _scheduler(store, budget=100, threshold=0.99)
+    scheduler.mark_fetched(scheduler.windows(NOW), NOW)
+
+    assert scheduler.plan(NOW + timedelta(days=1)) == []
+
+
+def test_volatile_window_is_refreshed_before_calm_one(store):
+    volatile_day, calm_day = "2025-09-11", "2025-10-02"
+    for run in range(12):
+        observed_at = NOW - timedelta(hours=6 * (12 - run))
+        store.append([
+            _flight(volatile_day, 100.0 if run % 2 else 200.0),
+            _flight(calm_day, 100.0),
+        ], observed_at)
+    scheduler = _scheduler(store, budget=1)
+    scheduler.mark_fetched(scheduler.windows(NOW), NOW)
+
+    window_rates, _ = scheduler.change_rates(NOW)
+    planned = scheduler.plan(NOW + timedelta(hours=12))
+
+    volatile = scheduler._window_id(datetime.fromisoformat(volatile_day).date())
+    calm = scheduler._window_id(datetime.fromisoformat(calm_day).date())
+    assert window_rates[volatile] > window_rates[calm]
+    assert window_rates[calm] == scheduler.min_rate
+    assert [window.windowId for window in planned] == [volatile]
+
+
+def test_fetch_state_survives_restart(store):
+    scheduler = _scheduler(store)
+    scheduler.mark_fetched(scheduler.plan(NOW), NOW)
+
+    restarted = _scheduler(store)
+
+    assert restarted.last_fetched == scheduler.last_fetched
+    assert restarted.plan(NOW) == scheduler.plan(NOW)